@@ -3,6 +3,8 @@ from pygame.locals import *
 from OpenGL.GL import *
 from OpenGL.GLU import *
 import random
+import ctypes
+import numpy as np
 
 vertices = (
     (1, -1, -1),
@@ -63,68 +65,94 @@ ground_vertices = (
     (10, -1.1, -300)
 )
 
-def ground():
-    glBegin(GL_QUADS)
-    x = 0
-    for vertex in ground_vertices:
-        x+=1
-        glColor3fv((0, 1, 1))
-        #glColor3fv((0, 0.5, 0.5))
-        glVertex3fv(vertex)
-    glEnd()
-
-def set_vertices(max_distance):
-    x_value_change = random.randrange(-10, 10)
-    y_value_change = -1 # random.randrange(-10, 10)
-    z_value_change = random.randrange(-max_distance, -20)
-
-    new_vertices = []
-
-    for vert in vertices:
-        new_vert = []
-
-        new_x = vert[0] + x_value_change
-        new_y = vert[1] + y_value_change
-        new_z = vert[2] + z_value_change
-
-        new_vert.append(new_x)
-        new_vert.append(new_y)
-        new_vert.append(new_z)
-
-        new_vertices.append(new_vert)
-    return new_vertices
-
-def Cube(vertices):
-    glBegin(GL_QUADS)
-    # glColor3fv((0, 1, 0)) #sets constant color for block
-    for surface in surfaces:
-        x = 0
-        # green:
-        # glColor3fv((0, 1, 0)) #sets surface color
-        for vertex in surface:
-            x += 1
-            glColor3fv(colors[x])
-            # glColor3fv((0, 1, 0)) #sets vertex color
-            glVertex3fv(vertices[vertex]) #CHANGED
-
-    glEnd()
-
-    glBegin(GL_LINES)
-    for edge in edges:
-        for vertex in edge:
-            glVertex3fv(vertices[vertex])
-    glEnd()
+# bytes per interleaved [x, y, z, r, g, b] vertex
+VERTEX_STRIDE = 6 * 4
+
+def build_cube_buffers(translations):
+    # the quads color each surface corner with colors[1..4] so every surface
+    # gets its own 4 vertices, the edges reuse the 8 corners in white
+    quad_positions = [vertices[vertex] for surface in surfaces for vertex in surface]
+    quad_colors = [colors[x + 1] for surface in surfaces for x in range(len(surface))]
+    edge_positions = list(vertices)
+    edge_colors = [(1, 1, 1)] * len(vertices)
+
+    positions = np.array(quad_positions + edge_positions, dtype=np.float32)
+    vertex_colors = np.array(quad_colors + edge_colors, dtype=np.float32)
+    vertices_per_cube = len(positions)
+
+    # every cube gets its own translated copy of the template so all of them draw in one call
+    cube_count = len(translations)
+    all_positions = set_vertices(positions, translations).reshape(-1, 3)
+    all_colors = np.tile(vertex_colors, (cube_count, 1))
+    interleaved = np.hstack((all_positions, all_colors))
+
+    cube_offsets = (np.arange(cube_count, dtype=np.uint32) * vertices_per_cube)[:, None]
+    quad_template = np.arange(len(quad_positions), dtype=np.uint32)
+    edge_template = np.array(edges, dtype=np.uint32).ravel() + len(quad_positions)
+    quad_indices = (cube_offsets + quad_template[None, :]).ravel()
+    edge_indices = (cube_offsets + edge_template[None, :]).ravel()
+    indices = np.concatenate((quad_indices, edge_indices))
+
+    vbo = glGenBuffers(1)
+    glBindBuffer(GL_ARRAY_BUFFER, vbo)
+    glBufferData(GL_ARRAY_BUFFER, interleaved.nbytes, interleaved, GL_STATIC_DRAW)
+
+    ibo = glGenBuffers(1)
+    glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ibo)
+    glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+
+    return vbo, ibo, len(quad_indices), len(edge_indices)
+
+def build_ground_buffer():
+    positions = np.array(ground_vertices, dtype=np.float32)
+    ground_colors = np.tile(np.array((0, 1, 1), dtype=np.float32), (len(ground_vertices), 1))
+    #ground_colors = np.tile(np.array((0, 0.5, 0.5), dtype=np.float32), (len(ground_vertices), 1))
+    interleaved = np.hstack((positions, ground_colors))
+
+    vbo = glGenBuffers(1)
+    glBindBuffer(GL_ARRAY_BUFFER, vbo)
+    glBufferData(GL_ARRAY_BUFFER, interleaved.nbytes, interleaved, GL_STATIC_DRAW)
+    return vbo
+
+def bind_vertex_buffer(vbo):
+    glBindBuffer(GL_ARRAY_BUFFER, vbo)
+    glVertexPointer(3, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(0))
+    glColorPointer(3, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(12))
+
+def ground(ground_vbo):
+    bind_vertex_buffer(ground_vbo)
+    glDrawArrays(GL_QUADS, 0, len(ground_vertices))
+
+def set_translations(max_distance, count):
+    x_value_change = np.random.randint(-10, 10, count)
+    y_value_change = np.full(count, -1) # np.random.randint(-10, 10, count)
+    z_value_change = np.random.randint(-max_distance, -20, count)
+    return np.column_stack((x_value_change, y_value_change, z_value_change)).astype(np.float32)
+
+def set_vertices(base_vertices, translations):
+    # (count, 3) translations over (n, 3) vertices gives (count, n, 3) translated vertices
+    return base_vertices[None, :, :] + translations[:, None, :]
+
+def Cubes(cube_buffers):
+    vbo, ibo, quad_count, edge_count = cube_buffers
+    bind_vertex_buffer(vbo)
+    glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ibo)
+    glDrawElements(GL_QUADS, quad_count, GL_UNSIGNED_INT, ctypes.c_void_p(0))
+    glDrawElements(GL_LINES, edge_count, GL_UNSIGNED_INT, ctypes.c_void_p(quad_count * 4))
 
 def main():
     pygame.init()
     display = (800, 600)
     pygame.display.set_mode(display, DOUBLEBUF|OPENGL)
 
+    glMatrixMode(GL_PROJECTION)
     gluPerspective(45, (display[0]/display[1]), 0.1, 50.0)
+    glMatrixMode(GL_MODELVIEW)
 
-    # glTranslatef(0.0, 0.0, -5)
-    # glTranslatef(1, 1, -5)
-    glTranslatef(random.randrange(-5, 5), random.randrange(-5, 5), -40)
+    # the camera translation is kept here so it never has to be read back from the gpu
+    # camera = [0.0, 0.0, -5]
+    # camera = [1, 1, -5]
+    camera = [random.randrange(-5, 5), random.randrange(-5, 5), -40]
 
     # glRotatef(0, 0, 0, 0)
     # glRotatef(40, 2, 0, 0)
@@ -135,12 +163,16 @@ def main():
     x_move = 0
     y_move = 0
 
+    clock = pygame.time.Clock()
+
     max_distance = 100
 
-    cube_dict = {}
+    cube_translations = set_translations(max_distance, 20)
 
-    for x in range(20):
-        cube_dict[x] = set_vertices(max_distance)
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glEnableClientState(GL_COLOR_ARRAY)
+    cube_buffers = build_cube_buffers(cube_translations)
+    ground_vbo = build_ground_buffer()
 
     while True: # not object_passed:
         for event in pygame.event.get():
@@ -176,27 +208,24 @@ def main():
 
         # glRotatef(1, 3, 1, 1)
 
-        x = glGetDoublev(GL_MODELVIEW_MATRIX) #, modelviewMatrix
-        # print(x)
-
-        camera_x = x[3][0]
-        camera_y = x[3][1]
-        camera_z = x[3][2]
+        camera[0] += x_move
+        camera[1] += y_move
+        camera[2] += .50
 
-        glTranslatef(x_move, y_move, .50)
+        glLoadIdentity()
+        glTranslatef(*camera)
 
-        # if camera_z < -1:
+        # if camera[2] < -1:
         #     object_passed = True
 
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
 
-        ground()
+        ground(ground_vbo)
 
-        for each_cube in cube_dict:
-            Cube(cube_dict[each_cube])
+        Cubes(cube_buffers)
 
         pygame.display.flip() #.update() doesn't work here for some reason
-        pygame.time.wait(10)
+        clock.tick(100)
 
 #for x in range(10):
 main()
@@ -1,16 +1,120 @@
 # Standard Library Imports
-from struct import unpack
-from math import sqrt, atan
-from binascii import hexlify
-from codecs import decode
+from struct import Struct
+from math import sqrt, atan2
 from enum import Enum
-from typing import List, Union
+from operator import index as operator_index
+from typing import Iterator, Tuple, Union
 
 # Package Imports
+import numpy as np
 from serial import Serial
 
 # Self Imports
 from control import Ports
+import kernels
+
+try:
+    # the ahead of time compiled kernels, built with data_kernels_build.py
+    from data_kernels import compute_geometry
+except ImportError:
+    # fall back to compiling the kernels on import
+    from numba import njit
+    compute_geometry = njit(kernels.GEOMETRY_SIGNATURE, cache=True, fastmath=True)(kernels.compute_geometry)
+
+# The magic pattern that starts every packet header from the IWR6843
+_MAGIC: bytes = bytes([2, 1, 4, 3, 6, 5, 8, 7])
+
+# The header fields after the magic pattern and version: packet length, platform, frame number,
+# time in cpu cycles, number of detected objects, number of tlvs, and sub frame number
+_HEADER: Struct = Struct('<7I')
+
+# The type and length that start every tlv sub-packet
+_TLV_HEADER: Struct = Struct('<2I')
+
+# The factor converting radians to degrees (180/pi)
+_RAD2DEG: float = kernels.RAD2DEG
+
+def _u32(data: bytes) -> int:
+    """_u32 parse a little endian unsigned 32 bit integer from the start of a bytes object
+
+    Parameters
+    ----------
+    data : bytes
+        the bytes object
+
+    Returns
+    -------
+    int
+        the parsed integer
+
+    Raises
+    ------
+    IndexError
+        if the bytes object is shorter than 4 bytes
+    """
+    if len(data) < 4:
+        raise IndexError("32 bit integer needs 4 bytes, got " + str(len(data)))
+    return int.from_bytes(data[:4], 'little')
+
+def _u16(data: bytes) -> int:
+    """_u16 parse a little endian unsigned 16 bit integer from the start of a bytes object
+
+    Parameters
+    ----------
+    data : bytes
+        the bytes object
+
+    Returns
+    -------
+    int
+        the parsed integer
+
+    Raises
+    ------
+    IndexError
+        if the bytes object is shorter than 2 bytes
+    """
+    if len(data) < 2:
+        raise IndexError("16 bit integer needs 2 bytes, got " + str(len(data)))
+    return int.from_bytes(data[:2], 'little')
+
+def _check_magic_pattern(data: bytes) -> int:
+    """_check_magic_pattern check if a bytes object starts with the magic pattern (of IWR6843)
+
+    Parameters
+    ----------
+    data : bytes
+        the bytes object
+
+    Returns
+    -------
+    int
+        the 0 or 1 value representing if a magic pattern was found
+    """
+    return 1 if data[:8] == _MAGIC else 0
+
+def _batch_geometry(x: np.ndarray, y: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """_batch_geometry calculate the range, azimuth, and elevation angle of a batch of measured x, y, and z values
+
+    Parameters
+    ----------
+    x : np.ndarray
+        the measured x values
+    y : np.ndarray
+        the measured y values
+    z : np.ndarray
+        the measured z values
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        the calculated ranges, azimuths in degrees, and elevation angles in degrees
+    """
+    # the kernels need writeable contiguous arrays, views from np.frombuffer are read-only
+    x = np.require(x, dtype=np.float32, requirements=['C', 'W'])
+    y = np.require(y, dtype=np.float32, requirements=['C', 'W'])
+    z = np.require(z, dtype=np.float32, requirements=['C', 'W'])
+    return compute_geometry(x, y, z)
 
 class ParserStatus(Enum):
     """ParserStatus enumeration for parsing status
@@ -36,7 +140,7 @@ class BytesUtils:
         int
             the parsed integer
         """
-        return (data[0] + data[1]*256 + data[2]*65536 + data[3]*16777216)
+        return _u32(data)
 
     @classmethod
     def get_uint16(cls, data: bytes) -> int:
@@ -52,7 +156,7 @@ class BytesUtils:
         int
             the parsed integer
         """
-        return (data[0] + data[1]*256)
+        return _u16(data)
 
     @classmethod
     def check_magic_pattern(cls, data: bytes) -> int:
@@ -68,15 +172,14 @@ class BytesUtils:
         int
             the 0 or 1 value representing if a magic pattern was found in the IWR6843
         """
-        found = 0
-        if (data[0] == 2 and data[1] == 1 and data[2] == 4 and data[3] == 3 and data[4] == 6 and data[5] == 5 and data[6] == 8 and data[7] == 7):
-            found = 1
-        return (found)
+        return _check_magic_pattern(data)
 
 class MathUtils:
     """MathUtils are utiliites for performing calculations on recieved data
     """
-    ONEHUNDRENDEIGHTYOVERPI = 57.2957795131
+    ONEHUNDREDEIGHTYOVERPI = _RAD2DEG
+    # The previous misspelled name, kept for compatibility
+    ONEHUNDRENDEIGHTYOVERPI = ONEHUNDREDEIGHTYOVERPI
 
     @classmethod
     def radians_to_degrees(cls, angle: float) -> float:
@@ -92,7 +195,7 @@ class MathUtils:
         float
             the angle in degrees
         """
-        return cls.ONEHUNDRENDEIGHTYOVERPI*angle
+        return _RAD2DEG*angle
 
     @classmethod
     def get_range(cls, x: float, y: float, z: float) -> float:
@@ -130,13 +233,9 @@ class MathUtils:
         float
             the meausred azimuth in degrees
         """
-        if y != 0.0:
-            return cls.radians_to_degrees(atan(x/y))
-        else:
-            if x < 0.0:
-                return -90.0
-            else:
-                return 90.0
+        # folding the sign of y into x keeps the azimuth of atan(x/y) within -90 to 90 degrees,
+        # a comparison rather than copysign so -0.0 is treated like 0.0
+        return _RAD2DEG*atan2((-1.0 if y < 0.0 else 1.0)*x, abs(y))
 
     @classmethod
     def get_elev_angle(cls, x: float, y: float, z: float) -> float:
@@ -156,13 +255,27 @@ class MathUtils:
         float
             the measured elevation angle in degrees
         """
-        if x == 0.0 and y == 0.0:
-            if z < 0.0:
-                return -90.0
-            else:
-                return 90.0
-        else:
-            return cls.radians_to_degrees(atan(z/sqrt((x**2)+(y**2))))
+        return _RAD2DEG*atan2(z, sqrt((x*x)+(y*y)))
+
+    @classmethod
+    def batch_geometry(cls, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """batch_geometry calculate the range, azimuth, and elevation angle of a batch of measured x, y, and z values
+
+        Parameters
+        ----------
+        x : np.ndarray
+            the measured x values
+        y : np.ndarray
+            the measured y values
+        z : np.ndarray
+            the measured z values
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, np.ndarray]
+            the calculated ranges, azimuths in degrees, and elevation angles in degrees
+        """
+        return _batch_geometry(x, y, z)
 
 class PacketInfo:
     """PacketInfo stores info on a data packet recieved from the IWR6843
@@ -207,6 +320,9 @@ class PacketInfo:
 class DetectedObject:
     """DetectedObject stores info on a detected object parsed from a packet from the IWR6843
     """
+
+    __slots__ = ('x', 'y', 'z', 'v', 'computed_range', 'azimuth', 'elev_angle', 'snr', 'noise')
+
     x: float
     y: float
     z: float
@@ -230,7 +346,7 @@ class DetectedObject:
             the measured z coordinate of the object, by default 0.0
         v : float, optional
             the measured velocity of the object, by default 0.0
-        range : float, optional
+        computed_range : float, optional
             the measured range of the object, by default 0.0
         azimuth : float, optional
             the measured azimuth angle of the object, by default 0.0
@@ -245,7 +361,7 @@ class DetectedObject:
         self.y = y
         self.z = z
         self.v = v
-        self.computed_range = range
+        self.computed_range = computed_range
         self.azimuth = azimuth
         self.elev_angle = elev_angle
         self.snr = snr
@@ -313,7 +429,107 @@ class DetectedObject:
         return
 
     def __repr__(self) -> str:
-        return str(self.__dict__)
+        return str({name: getattr(self, name) for name in self.__slots__})
+
+class DetectedObjectView:
+    """DetectedObjectView is a lightweight view of a single detected object stored in a DetectedObjects
+    """
+
+    __slots__ = ('_objects', '_index')
+
+    def __init__(self, objects: 'DetectedObjects', index: int):
+        """__init__ initialize this view
+
+        Parameters
+        ----------
+        objects : DetectedObjects
+            the detected objects this view reads from
+        index : int
+            the index of the viewed object
+        """
+        self._objects = objects
+        self._index = index
+
+    def __getattr__(self, name: str) -> Union[float, int]:
+        """__getattr__ get a field of the viewed object
+
+        Parameters
+        ----------
+        name : str
+            the name of the field
+
+        Returns
+        -------
+        Union[float, int]
+            the value of the field for the viewed object, snr and noise are ints
+
+        Raises
+        ------
+        AttributeError
+            if the field is not a field of a detected object
+        """
+        if name not in DetectedObjects.FIELDS:
+            raise AttributeError(name)
+        return getattr(self._objects, name)[self._index].item()
+
+    def __repr__(self) -> str:
+        return str({name: getattr(self, name) for name in DetectedObjects.FIELDS})
+
+class DetectedObjects:
+    """DetectedObjects stores info on all detected objects parsed from a packet from the IWR6843 as parallel arrays
+    It can be indexed, sliced, and iterated like the list of detected objects it replaces, slices share the arrays
+    """
+
+    # The per object fields, each stored as an array
+    FIELDS: Tuple[str, ...] = DetectedObject.__slots__
+
+    # The fields parsed as unsigned 16 bit integers, all other fields are 32 bit floats
+    INTEGER_FIELDS: Tuple[str, ...] = ('snr', 'noise')
+
+    x: np.ndarray
+    y: np.ndarray
+    z: np.ndarray
+    v: np.ndarray
+    computed_range: np.ndarray
+    azimuth: np.ndarray
+    elev_angle: np.ndarray
+    snr: np.ndarray
+    noise: np.ndarray
+
+    def __init__(self, number_detected_objects: int = 0):
+        """__init__ initialize this object with zeroed fields
+
+        Parameters
+        ----------
+        number_detected_objects : int, optional
+            the number of detected objects, by default 0
+        """
+        for name in self.FIELDS:
+            dtype = np.uint16 if name in self.INTEGER_FIELDS else np.float32
+            setattr(self, name, np.zeros(number_detected_objects, dtype=dtype))
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[DetectedObjectView, 'DetectedObjects']:
+        if isinstance(index, slice):
+            sliced = DetectedObjects.__new__(DetectedObjects)
+            for name in self.FIELDS:
+                setattr(sliced, name, getattr(self, name)[index])
+            return sliced
+        index = operator_index(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("detected object index out of range")
+        return DetectedObjectView(self, index)
+
+    def __iter__(self) -> Iterator[DetectedObjectView]:
+        for index in range(len(self)):
+            yield DetectedObjectView(self, index)
+
+    def __repr__(self) -> str:
+        return str(list(self))
 
 class PacketHandler:
     """PacketHandler handles and parses a packet from the IWR6843
@@ -322,6 +538,9 @@ class PacketHandler:
     # The byte size of a header
     HEADER_BYTE_SIZE: int = 40
 
+    # The largest packet length that is waited on before the header is treated as corrupt
+    MAX_PACKET_BYTE_SIZE: int = 65536
+
     def __init__(self):
         pass
 
@@ -340,33 +559,14 @@ class PacketHandler:
             the info on the packet
         """
 
-        header_start_index = -1
-        num_bytes = len(data)
-
-        for index in range(num_bytes):
-            if BytesUtils.check_magic_pattern(data[index:index+8:1]) == 1:
-                header_start_index = index
-                break
+        header_start_index = data.find(_MAGIC)
 
+        if header_start_index != -1 and header_start_index + cls.HEADER_BYTE_SIZE > len(data):
+            # the rest of the header has not been recieved yet
+            return PacketInfo(header_start_index)
         if header_start_index != -1:
-            packet_length = BytesUtils.get_uint32(
-                data[header_start_index+12:header_start_index+16:1]
-            )
-            frame_number = BytesUtils.get_uint32(
-                data[header_start_index+20:header_start_index+24:1]
-            )
-            time_cpu_cycles = BytesUtils.get_uint32(
-                data[header_start_index+24:header_start_index+28:1]
-            )
-            number_detected_objects = BytesUtils.get_uint32(
-                data[header_start_index+28:header_start_index+32:1]
-            )
-            number_tlv = BytesUtils.get_uint32(
-                data[header_start_index+32:header_start_index+36:1]
-            )
-            sub_frame_number = BytesUtils.get_uint32(
-                data[header_start_index+36:header_start_index+40:1]
-            )
+            packet_length, _, frame_number, time_cpu_cycles, number_detected_objects, number_tlv, sub_frame_number = \
+                _HEADER.unpack_from(data, header_start_index+12)
             return PacketInfo(header_start_index, packet_length, number_detected_objects, number_tlv, frame_number, sub_frame_number, time_cpu_cycles)
         return PacketInfo()
 
@@ -398,12 +598,12 @@ class PacketHandler:
         else:
             next_header_start_index = packet_info.header_start_index + packet_info.packet_length
             if (next_header_start_index + 8) < packet_info.packet_length and \
-                    (BytesUtils.check_magic_pattern(data[next_header_start_index:next_header_start_index+8:1]) == 0):
+                    (_check_magic_pattern(data[next_header_start_index:next_header_start_index+8:1]) == 0):
                 return ParserStatus.TC_FAIL
         return ParserStatus.TC_PASS
 
     @classmethod
-    def _parse_tlvs(cls, data: bytes, packet_info: PacketInfo) -> List[DetectedObject]:
+    def _parse_tlvs(cls, data: bytes, packet_info: PacketInfo) -> Union[DetectedObjects, None]:
         """_parse_tlvs parse the sub-packet tlvs from a recieved buffer
 
         Parameters
@@ -415,47 +615,57 @@ class PacketHandler:
 
         Returns
         -------
-        List[DetectedObject]
-            the list of detected objects updated with the sub-packet information
+        Union[DetectedObjects, None]
+            the detected objects updated with the sub-packet information, None if a tlv does not fit in the packet
         """
 
-        detected_objects = []
-        for _ in range(packet_info.number_detected_objects):
-            detected_objects.append(DetectedObject())
-        tlv_start = packet_info.header_start_index + 40
-        tlv_type = BytesUtils.get_uint32(data[(tlv_start+0):(tlv_start+4):1])
-        tlv_len = BytesUtils.get_uint32(data[(tlv_start+4):(tlv_start+8):1])
-        offset = 8
-
-        if tlv_type == 1 and tlv_len < packet_info.packet_length:
-            for obj in range(packet_info.number_detected_objects):
-                x = unpack('<f', decode(hexlify(data[tlv_start + offset:tlv_start + offset+4:1]),'hex'))[0]
-                y = unpack('<f', decode(hexlify(data[tlv_start + offset+4:tlv_start + offset+8:1]),'hex'))[0]
-                z = unpack('<f', decode(hexlify(data[tlv_start + offset+8:tlv_start + offset+12:1]),'hex'))[0]
-                v = unpack('<f', decode(hexlify(data[tlv_start + offset+12:tlv_start + offset+16:1]),'hex'))[0]
-                computed_range = MathUtils.get_range(x, y, z)
-                azimuth = MathUtils.get_azimuth(x, y)
-                elev_angle = MathUtils.get_elev_angle(x, y, z)
-
-                detected_objects[obj].tlv_type_1(x, y, z, v, computed_range, azimuth, elev_angle)
-                offset = offset + 16
-
-        tlv_start = tlv_start + 8 + tlv_len
-        tlv_type = BytesUtils.get_uint32(data[tlv_start+0:tlv_start+4:1])
-        tlv_len = BytesUtils.get_uint32(data[tlv_start+4:tlv_start+8:1])
-        offset = 8
-
-        if tlv_type == 7:
-            for obj in range(packet_info.number_detected_objects):
-                snr = BytesUtils.get_uint16(data[tlv_start + offset + 0:tlv_start + offset + 2:1])
-                noise = BytesUtils.get_uint16(data[tlv_start + offset + 2:tlv_start + offset + 4:1])
-                detected_objects[obj].tlv_type_7(snr, noise)
-                offset = offset + 4
+        number_detected_objects = packet_info.number_detected_objects
+        # each object takes at least 16 bytes of tlv data, so a larger count is corrupt and must not be allocated
+        if number_detected_objects*16 > packet_info.packet_length - cls.HEADER_BYTE_SIZE:
+            return None
+        detected_objects = DetectedObjects(number_detected_objects)
+        packet_end = packet_info.header_start_index + packet_info.packet_length
+        tlv_start = packet_info.header_start_index + cls.HEADER_BYTE_SIZE
+
+        if packet_info.number_tlv > 0:
+            if tlv_start + 8 > packet_end:
+                return None
+            tlv_type, tlv_len = _TLV_HEADER.unpack_from(data, tlv_start)
+            if tlv_start + 8 + tlv_len > packet_end:
+                return None
+
+            if tlv_type == 1:
+                # each object is 4 little endian floats: x, y, z, v
+                if number_detected_objects*16 > tlv_len:
+                    return None
+                points = np.frombuffer(data, dtype='<f4', count=4*number_detected_objects, offset=tlv_start+8).reshape(number_detected_objects, 4)
+                detected_objects.x[:] = points[:, 0]
+                detected_objects.y[:] = points[:, 1]
+                detected_objects.z[:] = points[:, 2]
+                detected_objects.v[:] = points[:, 3]
+                detected_objects.computed_range, detected_objects.azimuth, detected_objects.elev_angle = \
+                    _batch_geometry(detected_objects.x, detected_objects.y, detected_objects.z)
+            tlv_start = tlv_start + 8 + tlv_len
+
+        if packet_info.number_tlv > 1:
+            if tlv_start + 8 > packet_end:
+                return None
+            tlv_type, tlv_len = _TLV_HEADER.unpack_from(data, tlv_start)
+            if tlv_start + 8 + tlv_len > packet_end:
+                return None
+
+            if tlv_type == 7:
+                # each object is 2 little endian unsigned shorts: snr, noise
+                if number_detected_objects*4 > tlv_len:
+                    return None
+                side_info = np.frombuffer(data, dtype='<u2', count=2*number_detected_objects, offset=tlv_start+8).reshape(number_detected_objects, 2)
+                detected_objects.snr[:] = side_info[:, 0]
+                detected_objects.noise[:] = side_info[:, 1]
 
         return detected_objects
 
     @classmethod
-    def parser(cls, data: bytes) -> Union[List[DetectedObject], None]:
+    def parser(cls, data: bytes) -> Union[DetectedObjects, None]:
         """parser the main parser for a recieved buffer
 
         Parameters
@@ -465,8 +675,8 @@ class PacketHandler:
 
         Returns
         -------
-        Union[List[DetectedObject], None]
-            the list of detected objects if the parser status is a pass, none if the parser status is a fail
+        Union[DetectedObjects, None]
+            the detected objects if the parser status is a pass, none if the parser status is a fail
         """
         # TODO: Check for another packet and return that packet as well
         packet_info = cls._parse_packet_info(data)
@@ -476,12 +686,50 @@ class PacketHandler:
         else:
             return None
 
+    @classmethod
+    def parse_buffer(cls, data: Union[bytes, bytearray]) -> Tuple[Union[DetectedObjects, None], int]:
+        """parse_buffer parse the first packet from a buffer that is accumulated across reads
+
+        Parameters
+        ----------
+        data : Union[bytes, bytearray]
+            the accumulated buffer
+
+        Returns
+        -------
+        Tuple[Union[DetectedObjects, None], int]
+            the detected objects if the parser status is a pass (None if it is a fail) and the number of bytes at
+            the start of the buffer that can be discarded
+        """
+        packet_info = cls._parse_packet_info(data)
+        status = cls._get_status(data, packet_info)
+        header_start_index = packet_info.header_start_index
+        if status == ParserStatus.TC_PASS:
+            detected_objects = cls._parse_tlvs(data, packet_info)
+            if detected_objects is None:
+                # the tlvs do not fit in the packet, skip past its magic pattern to resync
+                return None, header_start_index + len(_MAGIC)
+            # a packet is at least a header long, so a corrupt zero length is still consumed
+            return detected_objects, header_start_index + max(packet_info.packet_length, cls.HEADER_BYTE_SIZE)
+        elif header_start_index == -1:
+            # keep the bytes that could be the start of a magic pattern split across reads
+            return None, max(len(data) - (len(_MAGIC) - 1), 0)
+        elif packet_info.packet_length == -1 or \
+                (packet_info.sub_frame_number <= 3 and packet_info.packet_length <= cls.MAX_PACKET_BYTE_SIZE and \
+                 header_start_index + packet_info.packet_length > len(data)):
+            # the rest of the packet has not been recieved yet
+            return None, header_start_index
+        else:
+            # the header is corrupt, skip past its magic pattern
+            return None, header_start_index + len(_MAGIC)
+
 class Reader:
     """Reader reads from the data port of the IWR6843
     """
 
     data_port: Serial
     parser: PacketHandler
+    read_buffer: bytearray
 
     def __init__(self, ports: Ports):
         """__init__ initialize the reader
@@ -493,15 +741,26 @@ class Reader:
         """
         self.data_port = ports.data_port
         self.parser = PacketHandler()
+        self.read_buffer = bytearray()
 
-    def read(self) -> Union[List[DetectedObject], None]:
+    def read(self) -> Union[DetectedObjects, None]:
         """read read from the data port
 
         Returns
         -------
-        Union[List[DetectedObject], None]
-            the list of detected objects if the read buffer contains data, None if the read buffer does not have any data
+        Union[DetectedObjects, None]
+            the detected objects of the newest complete packet in the read buffer, None if there is no complete packet
         """
-        read_buffer = self.data_port.read(self.data_port.inWaiting())
-        if len(read_buffer) > 0:
-            return self.parser.parser(read_buffer)
+        # accumulate across reads so a packet split between reads is parsed once it is complete
+        self.read_buffer += self.data_port.read(self.data_port.inWaiting())
+        if len(self.read_buffer) > 0:
+            # drain every complete packet so the buffer cannot fall behind the radar, keeping the newest
+            newest_detected_objects = None
+            while True:
+                detected_objects, consumed_bytes = self.parser.parse_buffer(self.read_buffer)
+                if consumed_bytes == 0:
+                    break
+                del self.read_buffer[:consumed_bytes]
+                if detected_objects is not None:
+                    newest_detected_objects = detected_objects
+            return newest_detected_objects
@@ -0,0 +1,18 @@
+# Standard Library Imports
+from os.path import dirname, abspath
+
+# Package Imports
+from numba.pycc import CC
+
+# Self Imports
+from kernels import GEOMETRY_SIGNATURE, compute_geometry
+
+# Ahead of time compile the kernels into a data_kernels extension next to this file, so data.py
+# does not pay numba's import and first call compile time when it starts reading from the IWR6843
+# Run once per install/python version with: python data_kernels_build.py
+cc = CC('data_kernels')
+cc.output_dir = dirname(abspath(__file__))
+cc.export('compute_geometry', GEOMETRY_SIGNATURE)(compute_geometry)
+
+if __name__ == '__main__':
+    cc.compile()
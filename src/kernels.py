@@ -0,0 +1,46 @@
+# Standard Library Imports
+from math import sqrt, atan2
+from typing import Tuple
+
+# Package Imports
+import numpy as np
+
+# Self Imports
+None
+
+# The factor converting radians to degrees (180/pi)
+RAD2DEG: float = 57.2957795131
+
+# The numba signature of compute_geometry, shared by the jit and ahead of time builds
+GEOMETRY_SIGNATURE: str = 'UniTuple(float32[:], 3)(float32[:], float32[:], float32[:])'
+
+def compute_geometry(x: np.ndarray, y: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """compute_geometry calculate the range, azimuth, and elevation angle of a batch of measured x, y, and z values in one pass
+    This is the plain python source, data.py uses it compiled by numba
+
+    Parameters
+    ----------
+    x : np.ndarray
+        the measured x values
+    y : np.ndarray
+        the measured y values
+    z : np.ndarray
+        the measured z values
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        the calculated ranges, azimuths in degrees, and elevation angles in degrees
+    """
+    n = x.size
+    computed_range = np.empty(n, dtype=np.float32)
+    azimuth = np.empty(n, dtype=np.float32)
+    elev_angle = np.empty(n, dtype=np.float32)
+    for i in range(n):
+        xy2 = (x[i]*x[i]) + (y[i]*y[i])
+        computed_range[i] = sqrt(xy2 + (z[i]*z[i]))
+        # folding the sign of y into x keeps the azimuth of atan(x/y) within -90 to 90 degrees
+        # a comparison rather than copysign so -0.0 is treated like 0.0, as atan(x/y) did
+        azimuth[i] = RAD2DEG*atan2((-1.0 if y[i] < 0.0 else 1.0)*x[i], abs(y[i]))
+        elev_angle[i] = RAD2DEG*atan2(z[i], sqrt(xy2))
+    return computed_range, azimuth, elev_angle